@@ -4,11 +4,12 @@ from data_structures.ChainHashMap import ChainHashMap
 from data_structures.DoubleList import DoubleList
 from data_structures.Tree import Tree, TreeNode
 from data_structures.HeapPriorityQueue import HeapPriorityQueue
-import time, random
+import time, random, math, multiprocessing
 
 EMPTY, WHITE, BLACK = 0, 1, -1
 BOARD_SIZE = 8
 ALLOWED_TIME = 2.5
+EXPLORATION = 1.4
 INF = 10**9
 PIECE_DICT = {
     WHITE: 'W',
@@ -23,12 +24,49 @@ class Square(object):
     def __str__(self):
         return PIECE_DICT[self.piece]
 
+class Tables(object):
+    def __init__(self, n=BOARD_SIZE):
+        self.n = n
+        rng = random.Random(1)
+        self.zobrist_keys = [[[rng.getrandbits(64) for _ in range(3)] for _ in range(n)] for _ in range(n)]
+        self.side_key = rng.getrandbits(64)
+        self.forward = {}
+        self.attacks = {}
+        self.targets = {}
+        self.advance = {}
+        for player in (WHITE, BLACK):
+            forward = [[None]*n for _ in range(n)]
+            attacks = [[[] for _ in range(n)] for _ in range(n)]
+            targets = [[[] for _ in range(n)] for _ in range(n)]
+            for r in range(n):
+                nr = r + DIRECTION[player]
+                if not 0 <= nr < n:
+                    continue
+                for c in range(n):
+                    forward[r][c] = (nr, c)
+                    attacks[r][c] = [(nr, nc) for nc in (c-1, c+1) if 0 <= nc < n]
+                    targets[r][c] = [(nr, nc) for nc in (c-1, c, c+1) if 0 <= nc < n]
+            self.forward[player] = forward
+            self.attacks[player] = attacks
+            self.targets[player] = targets
+            self.advance[player] = [r if player == WHITE else n-1-r for r in range(n)]
+        mid = n//2
+        center = [(mid-1, mid-1), (mid-1, mid), (mid, mid-1), (mid, mid)] if n % 2 == 0 else [(mid, mid)]
+        self.center = [[n - min(abs(r-cr)+abs(c-cc) for cr, cc in center) for c in range(n)] for r in range(n)]
+
+TABLES = {BOARD_SIZE: Tables(BOARD_SIZE)}
+
+def get_tables(n=BOARD_SIZE):
+    if n not in TABLES:
+        TABLES[n] = Tables(n)
+    return TABLES[n]
+
 class Zobrist(object):
     def __init__(self, n=BOARD_SIZE):
-        random.seed(1)
+        tables = get_tables(n)
         self.n = n
-        self.key_table = [[[random.getrandbits(64) for _ in range(3)] for _ in range(n)] for _ in range(n)]
-        self.side_key = random.getrandbits(64)
+        self.key_table = tables.zobrist_keys
+        self.side_key = tables.side_key
         self.hash = 0
     def update_square(self, row, col, piece):
         self.hash ^= self.key_table[row][col][piece]
@@ -49,7 +87,8 @@ class State(object):
         self.history = Stack()
         self.white_list = DoubleList()
         self.black_list = DoubleList()
-        self.zobrist = Zobrist()
+        self.tables = get_tables(n)
+        self.zobrist = Zobrist(n)
     def set_piece(self, row, col, piece):
         old = self.board[row][col].piece
         if old:
@@ -92,14 +131,15 @@ class State(object):
         print("\n To move: ", "WHITE" if self.to_move == WHITE else "BLACK", "\n")
     def generate_moves(self, player):
         moves = []
-        direction = DIRECTION[player]
+        forward = self.tables.forward[player]
+        attacks = self.tables.attacks[player]
         pieces = self.white_list if player == WHITE else self.black_list
         for (row, col) in pieces:
-            new_row = row + direction
-            if 0 <= new_row < self.n and self.board[new_row][col].piece == EMPTY:
-                moves.append((row, col, new_row, col))
-            for new_col in (col-1, col+1):
-                if 0 <= new_col < self.n and self.board[new_row][new_col].piece != player:
+            target = forward[row][col]
+            if target is not None and self.board[target[0]][col].piece == EMPTY:
+                moves.append((row, col, target[0], col))
+            for new_row, new_col in attacks[row][col]:
+                if self.board[new_row][new_col].piece != player:
                     moves.append((row, col, new_row, new_col))
         return moves
     def make_move(self, move):
@@ -133,6 +173,7 @@ class State(object):
 class Heuristic(object):
     def __init__(self, n=8):
         self.n = n
+        self.tables = get_tables(n)
         self.W_EAT = INF
         self.W_ADVANCE = 200
         self.W_MOBILITY = 40
@@ -164,23 +205,20 @@ class Heuristic(object):
 
     def advance(self, board, player):
         progress = 0
+        advance = self.tables.advance[player]
         for r in range(self.n):
             for c in range(self.n):
                 if board[r][c] == player:
-                    if player == WHITE:
-                        progress += r
-                    else:
-                        progress += (self.n - 1 - r)
+                    progress += advance[r]
         return progress
     def mobility_simple(self, board, player):
         moves = 0
-        dirs = [(DIRECTION[player], 0), (DIRECTION[player], -1), (DIRECTION[player], 1)]
+        targets = self.tables.targets[player]
         for r in range(self.n):
             for c in range(self.n):
                 if board[r][c] == player:
-                    for dr, dc in dirs:
-                        nr, nc = r + dr, c + dc
-                        if 0 <= nr < self.n and 0 <= nc < self.n and board[nr][nc] != player:
+                    for nr, nc in targets[r][c]:
+                        if board[nr][nc] != player:
                             moves += 1
         return moves
     def eat(self, board, player):
@@ -202,13 +240,11 @@ class Heuristic(object):
     def opponent_threat(self, board, player):
         opponent = WHITE if player == BLACK else BLACK
         threat = 0
+        advance = self.tables.advance[opponent]
         for r in range(self.n):
             for c in range(self.n):
                 if board[r][c] == opponent:
-                    if player == WHITE:
-                        threat += (self.n - 1 - r)
-                    else:
-                        threat += r
+                    threat += advance[r]
         return threat
     def winning_next(self, board, player):
         for c in range(self.n):
@@ -234,14 +270,13 @@ class Heuristic(object):
         return count
     def blocked_pawns(self, board, player):
         blocked = 0
-        dr = DIRECTION[player]
+        targets = self.tables.targets[player]
         for r in range(self.n):
             for c in range(self.n):
                 if board[r][c] == player:
                     moves = 0
-                    for dc in (-1, 0, 1):
-                        nr, nc = r + dr, c + dc
-                        if 0 <= nr < self.n and 0 <= nc < self.n and board[nr][nc] != player:
+                    for nr, nc in targets[r][c]:
+                        if board[nr][nc] != player:
                             moves += 1
                     if moves == 0:
                         blocked += 1
@@ -266,14 +301,12 @@ class Heuristic(object):
             return 1 if player == BLACK else -1
         return 0
     def center_proximity(self, board, player):
-        mid = self.n//2
-        center = [(mid-1, mid-1), (mid-1, mid), (mid, mid-1), (mid, mid)] if self.n % 2 == 0 else [(mid, mid)]
+        center = self.tables.center
         total = 0
         for r in range(self.n):
             for c in range(self.n):
                 if board[r][c] == player:
-                    dist = min(abs(r-cr)+abs(c-cc) for cr, cc in center)
-                    total += (self.n - dist)
+                    total += center[r][c]
         return total
 
 class Search(object):
@@ -367,6 +400,152 @@ class Search(object):
                 break
         return best_move
 
+class MCTS(object):
+    def __init__(self, state, allowed_time=ALLOWED_TIME, exploration=EXPLORATION, workers=1, seed=None):
+        self.s = state
+        self.allowed_time = allowed_time
+        self.exploration = exploration
+        self.workers = workers
+        self.rng = random.Random(seed)
+        self.start = 0.0
+        self.playouts = 0
+        self.reset()
+    def reset(self):
+        self.move = []
+        self.parent = []
+        self.mover = []
+        self.first_child = []
+        self.num_children = []
+        self.visits = []
+        self.wins = []
+        self.result = []
+    def new_node(self, move, parent, mover, result):
+        self.move.append(move)
+        self.parent.append(parent)
+        self.mover.append(mover)
+        self.first_child.append(0)
+        self.num_children.append(0)
+        self.visits.append(0)
+        self.wins.append(0)
+        self.result.append(result)
+        return len(self.move)-1
+    def time_exceeded(self):
+        return (time.time()-self.start) >= self.allowed_time
+    def goal_row(self, player):
+        return self.s.n-1 if player == WHITE else 0
+    def expand(self, node):
+        player = self.s.to_move
+        moves = self.s.generate_moves(player)
+        if len(moves) == 0:
+            self.result[node] = WHITE if player == BLACK else BLACK
+            return
+        goal = self.goal_row(player)
+        self.first_child[node] = len(self.move)
+        self.num_children[node] = len(moves)
+        for move in moves:
+            self.new_node(move, node, player, player if move[2] == goal else None)
+    def select(self, node):
+        first = self.first_child[node]
+        log_visits = math.log(self.visits[node])
+        best_child, best_value = None, -INF
+        for child in range(first, first+self.num_children[node]):
+            visits = self.visits[child]
+            if visits == 0:
+                return child
+            value = self.wins[child]/visits + self.exploration*math.sqrt(log_visits/visits)
+            if value > best_value:
+                best_child, best_value = child, value
+        return best_child
+    def playout(self):
+        depth = 0
+        winner = None
+        while winner is None:
+            player = self.s.to_move
+            moves = self.s.generate_moves(player)
+            if len(moves) == 0:
+                winner = WHITE if player == BLACK else BLACK
+                break
+            move = self.rng.choice(moves)
+            self.s.make_move(move)
+            depth += 1
+            if move[2] == self.goal_row(player):
+                winner = player
+        for _ in range(depth):
+            self.s.undo_move()
+        return winner
+    def backpropagate(self, node, winner):
+        while node != -1:
+            self.visits[node] += 1
+            if self.mover[node] == winner:
+                self.wins[node] += 1
+            node = self.parent[node]
+    def iterate(self):
+        node, depth = 0, 0
+        while self.num_children[node] and self.result[node] is None:
+            node = self.select(node)
+            self.s.make_move(self.move[node])
+            depth += 1
+        if self.result[node] is None:
+            self.expand(node)
+            if self.num_children[node]:
+                node = self.first_child[node] + self.rng.randrange(self.num_children[node])
+                self.s.make_move(self.move[node])
+                depth += 1
+        winner = self.result[node]
+        if winner is None:
+            winner = self.playout()
+        for _ in range(depth):
+            self.s.undo_move()
+        self.backpropagate(node, winner)
+        self.playouts += 1
+    def search(self):
+        self.reset()
+        self.playouts = 0
+        to_move = self.s.to_move
+        self.new_node(None, -1, WHITE if to_move == BLACK else BLACK, None)
+        while True:
+            self.iterate()
+            if self.time_exceeded():
+                break
+        first = self.first_child[0]
+        return [(self.move[c], self.visits[c], self.wins[c]) for c in range(first, first+self.num_children[0])]
+    def choose_move(self, player):
+        self.start = time.time()
+        if self.workers <= 1:
+            stats = self.search()
+        else:
+            pieces = [[self.s.board[r][c].piece for c in range(self.s.n)] for r in range(self.s.n)]
+            jobs = [(pieces, self.s.to_move, self.start, self.allowed_time, self.exploration, self.rng.getrandbits(32))
+                    for _ in range(self.workers)]
+            with multiprocessing.Pool(self.workers) as pool:
+                results = pool.map(mcts_worker, jobs)
+            totals = {}
+            self.playouts = 0
+            for worker_stats, playouts in results:
+                self.playouts += playouts
+                for move, visits, wins in worker_stats:
+                    total_visits, total_wins = totals.get(move, (0, 0))
+                    totals[move] = (total_visits+visits, total_wins+wins)
+            stats = [(move, visits, wins) for move, (visits, wins) in totals.items()]
+        best_move, best_visits = None, -1
+        for move, visits, _ in stats:
+            if visits > best_visits:
+                best_move, best_visits = move, visits
+        return best_move
+
+def mcts_worker(job):
+    pieces, to_move, start, allowed_time, exploration, seed = job
+    s = State(len(pieces))
+    for r in range(s.n):
+        for c in range(s.n):
+            if pieces[r][c]:
+                s.set_piece(r, c, pieces[r][c])
+    s.to_move = to_move
+    engine = MCTS(s, allowed_time, exploration, 1, seed)
+    engine.start = start
+    stats = engine.search()
+    return stats, engine.playouts
+
 def coord_to_str(r, c): 
     return f"{chr(ord('a')+c)}{r+1}"
 
@@ -374,11 +553,14 @@ def parse_coord(s, n=BOARD_SIZE):
     s = s.lower(); c = ord(s[0])-97; r = int(s[1:])-1
     return (r, c) if 0 <= c < n and 0 <= r < n else None
 
-def game(human_white):
+def game(human_white, use_mcts=False):
     s = State()
     h = Heuristic(n=BOARD_SIZE)
     s.set_start_position()
-    p = Search(s, h, ALLOWED_TIME, 6)
+    if use_mcts:
+        p = MCTS(s, ALLOWED_TIME, EXPLORATION, multiprocessing.cpu_count())
+    else:
+        p = Search(s, h, ALLOWED_TIME, 6)
     s.print_board()
     while True:
         win = s.winner()
@@ -430,7 +612,11 @@ def main():
                 print("2. BLACK")
                 side_choice = input("Enter your choice: ").strip()
                 play_white = True if side_choice == '1' else False
-                game(play_white)
+                print("Which AI engine do you want to play against?")
+                print("1. ALPHA-BETA")
+                print("2. MCTS")
+                engine_choice = input("Enter your choice: ").strip()
+                game(play_white, engine_choice == '2')
             if choice == 'x':
                 break
         else: